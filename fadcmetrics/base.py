@@ -1,19 +1,22 @@
 import sys
 import time
 import datetime
-from typing import Dict, List, Pattern
+from typing import Dict, List, Optional, Pattern
 from threading import Thread, Lock, Event, current_thread
 from fadcclient.api import FortiAdcApiClient
 from fadcmetrics.config import FadcMetricsConfig, TargetConfig
 from fadcmetrics.utils.logging import get_logger
+from fadcmetrics.utils.profiling import Profiler
 from fadcmetrics.exceptions import *
 from fadcmetrics.writers import HttpWriter, StdoutWriter
+from fadcmetrics.transport import HttpTransport
 
 
 class FadcFortiView():
 
-    def __init__(self, client: FortiAdcApiClient) -> None:
+    def __init__(self, client: FortiAdcApiClient, profiler: Profiler = None) -> None:
         self.client = client
+        self.profiler = profiler if profiler is not None else Profiler()
         self.logger = get_logger(name="FADC-FortiView", with_threads=True)
         self.vs_names = self.get_vs_names()
         self.vs_tree = self.get_vs_tree()
@@ -139,19 +142,21 @@ class FadcFortiView():
     def get_vs_status(self):
         results = {x: None for x in self.vs_names}
         for vs_name in self.vs_names:
-            response = self.client.send_request(
-                method="GET",
-                path='/api/status_history/vs_status',
-                params={
-                    "vdom": "root",
-                    "vsname": vs_name
-                }
-            )
-            is_error, error, data = self.client.handle_response(response=response)
-            if not is_error:
-                results[vs_name] = data
-                results[vs_name]['@timestamp'] = self.get_ts()
-            else:
+            with self.profiler.span("api"):
+                response = self.client.send_request(
+                    method="GET",
+                    path='/api/status_history/vs_status',
+                    params={
+                        "vdom": "root",
+                        "vsname": vs_name
+                    }
+                )
+            with self.profiler.span("parse"):
+                is_error, error, data = self.client.handle_response(response=response)
+                if not is_error:
+                    results[vs_name] = data
+                    results[vs_name]['@timestamp'] = self.get_ts()
+            if is_error:
                 self.logger.error(msg=f"Failed to get VS_STATUS for {vs_name}")
         
         results_list = []
@@ -166,21 +171,23 @@ class FadcFortiView():
     def get_vs_http(self):
         results = {x: None for x in self.vs_names}
         for vs_name in self.vs_names:
-            response = self.client.send_request(
-                method="GET",
-                path='/api/fortiview/get_vs_http',
-                params={
-                    "vdom": "root",
-                    "vs": vs_name
-                }
-            )
-            is_error, error, data = self.client.handle_response(response=response)
-            if not is_error:
-                results[vs_name] = {}
-                for key in [f"category_{x}" for x in range(4)]:
-                    results[vs_name].update(data[key])
-                results[vs_name]['@timestamp'] = self.get_ts()
-            else:
+            with self.profiler.span("api"):
+                response = self.client.send_request(
+                    method="GET",
+                    path='/api/fortiview/get_vs_http',
+                    params={
+                        "vdom": "root",
+                        "vs": vs_name
+                    }
+                )
+            with self.profiler.span("parse"):
+                is_error, error, data = self.client.handle_response(response=response)
+                if not is_error:
+                    results[vs_name] = {}
+                    for key in [f"category_{x}" for x in range(4)]:
+                        results[vs_name].update(data[key])
+                    results[vs_name]['@timestamp'] = self.get_ts()
+            if is_error:
                 self.logger.error(msg=f"Failed to get VS_HTTP for {vs_name}")
         
         results_list = []
@@ -193,11 +200,74 @@ class FadcFortiView():
         return results_list
 
 
+class FadcSystem():
+    """
+    System level information of single FortiADC, used to find the active member of HA cluster.
+
+    HA role is read from the single `HA_STATE_KEY` field of HA status, only values in `HA_STATES` are recognized.
+    """
+
+    ACTIVE = 'active'
+    STANDBY = 'standby'
+
+    HA_STATUS_PATH = '/api/system_ha_status'
+    HA_STATE_KEY = 'state'
+    HA_STATES = {
+        'active': ACTIVE,
+        'standby': STANDBY
+    }
+
+    # Hostnames for which unrecognized HA Status payload was already logged
+    unknown_logged = set()
+    unknown_lock = Lock()
+
+    def __init__(self, client: FortiAdcApiClient, hostname: str = None, profiler: Profiler = None) -> None:
+        self.client = client
+        self.hostname = hostname
+        self.profiler = profiler if profiler is not None else Profiler()
+        self.logger = get_logger(name="FADC-System", with_threads=True)
+
+    def log_unknown(self, data):
+        with self.unknown_lock:
+            if self.hostname in self.unknown_logged:
+                return
+            self.unknown_logged.add(self.hostname)
+        self.logger.warning(msg=f"Could not determine HA State of {self.hostname} from HA Status. {data=}")
+
+    def get_ha_state(self, vdom: str = 'root') -> Optional[str]:
+        """
+        :return: FadcSystem.ACTIVE, FadcSystem.STANDBY or None if the state could not be determined
+        """
+        with self.profiler.span("ha"):
+            response = self.client.send_request(
+                method="GET",
+                path=self.HA_STATUS_PATH,
+                params={
+                    "vdom": vdom
+                }
+            )
+        with self.profiler.span("parse"):
+            is_error, error, data = self.client.handle_response(response=response)
+            if not is_error and isinstance(data, list):
+                data = data[0] if len(data) else None
+        if is_error:
+            self.logger.error(msg=f"Failed to get HA Status of {self.hostname}. {error=}")
+            return None
+        state = None
+        if isinstance(data, dict):
+            state = self.HA_STATES.get(str(data.get(self.HA_STATE_KEY, '')).lower())
+        if state is None:
+            self.log_unknown(data=data)
+        return state
+
+
 class FortiAdcMetricScraper():
 
     def __init__(self, config: FadcMetricsConfig) -> None:
         self.config = config
         self.logger = get_logger(name="FADC-Metrics", with_threads=True)
+        self.profiler = Profiler.from_config(config=self.config.profile)
+        self.transport = self.get_transport()
         self.writers = self.get_writers()
         self.terminate = Event()
         self.failed = Event()
@@ -205,10 +275,30 @@ class FortiAdcMetricScraper():
     def get_ts(self):
         return datetime.datetime.utcnow().replace(tzinfo=datetime.timezone.utc)
 
+    def get_transport(self):
+        # Every target runs in its own worker thread which also calls all the writers
+        concurrency = len(self.config.targets)
+        hosts = len(self.config.targets) + len(self.config.writers)
+        transport = HttpTransport.from_config(config=self.config.transport, concurrency=concurrency, hosts=hosts)
+        self.logger.info(msg=f"HTTP Transport pool_connections={transport.pool_connections} pool_maxsize={transport.pool_maxsize}")
+        return transport
+
     def get_client(self, conn_spec: dict):
         client = FortiAdcApiClient(**conn_spec)
         return client
 
+    def use_transport(self, client: FortiAdcApiClient):
+        # Client closes its session on exit, so it gets own adapter reporting to the shared pool stats
+        session = getattr(client, 'session', None)
+        if session is not None and hasattr(session, 'adapters'):
+            self.transport.mount_client(session=session)
+        else:
+            self.logger.debug(msg="Client does not expose requests session, using its own connection pool.")
+
+    def log_pool_stats(self):
+        for host, stats in self.transport.pool_stats().items():
+            self.logger.info(msg=f"Pool stats for {host}: {stats}")
+
     def get_writers(self):
         writers_map = {
             "http": HttpWriter,
@@ -216,7 +306,7 @@ class FortiAdcMetricScraper():
         }
         writers = []
         for writer_config in self.config.writers:
-            writer = writers_map[writer_config.type].from_config(config=writer_config)
+            writer = writers_map[writer_config.type].from_config(config=writer_config, transport=self.transport, profiler=self.profiler)
             writers.append(writer)
         return writers
 
@@ -228,21 +318,74 @@ class FortiAdcMetricScraper():
                 self.terminate.set()
 
     def enrich_metrics(self, metrics: dict, tags: dict = None):
-        if tags is not None:
-            for metric in metrics:
-                if metric.get('tags') is None:
-                    metric['tags'] = dict()
-                metric['tags'].update(tags)
+        with self.profiler.span("enrich"):
+            if tags is not None:
+                for metric in metrics:
+                    if metric.get('tags') is None:
+                        metric['tags'] = dict()
+                    metric['tags'].update(tags)
+
+    def get_conn_spec(self, target: TargetConfig) -> dict:
+        return target.dict(include={'base_url', 'username', 'password', 'verify_ssl'})
+
+    def get_fortiview(self, client: FortiAdcApiClient, target: TargetConfig) -> FadcFortiView:
+        fortiview = FadcFortiView(client=client, profiler=self.profiler)
+        # Get VirtualServers names
+        if target.virtual_servers is not None:
+            fortiview.filter_vs_names(patterns=target.virtual_servers)
+        return fortiview
+
+    def scrape_round(self, fortiview: FadcFortiView, target: TargetConfig, tags: dict = None, system: FadcSystem = None) -> int:
+        """
+        Scrapes all configured topics once and writes results.
+
+        :param dict tags: Tags added to the metrics, defaults to `target.tags`
+        :param FadcSystem system: When given, HA state is checked first and HaStateException raised if it is standby
+        :return: Number of collected metrics
+        """
+        collected = 0
+        tags = tags if tags is not None else target.tags
+        topics = [x.topic for x in target.scrape_configs]
+        with self.profiler.round():
+            if system is not None and system.get_ha_state() == FadcSystem.STANDBY:
+                raise HaStateException(f"{target.hostname} changed HA State to {FadcSystem.STANDBY}")
+            if 'vs_status' in topics:
+                vs_status = fortiview.get_vs_status()
+                collected += len(vs_status)
+                self.enrich_metrics(metrics=vs_status, tags=tags)
+                self.write(data=vs_status, measurement="virtualServerStatus")
+            if 'vs_http_stats' in topics:
+                vs_http = fortiview.get_vs_http()
+                collected += len(vs_http)
+                self.enrich_metrics(metrics=vs_http, tags=tags)
+                self.write(data=vs_http, measurement="virtualServerHttpStats")
+        return collected
+
+    def wait(self, interval: int) -> bool:
+        """
+        Sleeps for `interval` seconds while watching the Terminate Event.
+
+        :return: True if the thread should terminate
+        """
+        # Number of seconds to sleep in each round
+        sleep_interval = 1
+        # Number of rounds
+        sleep_count = 0
+        while (sleep_interval * sleep_count) < interval:
+            if self.terminate.is_set():
+                self.logger.info(msg=f"Terminate Event is SET. Terminate Thread {current_thread().name}")
+                return True
+            sleep_count += 1
+            time.sleep(sleep_interval)
+        return False
 
     def worker(self, target: TargetConfig):
-        conn_spec = target.dict(include={'base_url', 'username', 'password', 'verify_ssl'})
+        conn_spec = self.get_conn_spec(target=target)
         self.logger.info(msg=f"Starting metrics scraping on {target.hostname} with scrape_interval={target.scrape_interval}")
         with self.get_client(conn_spec=conn_spec) as client:
-            fortiview = FadcFortiView(client=client)
-            # Get VirtualServers names
-            vs_names = []
-            if target.virtual_servers is not None:
-                fortiview.filter_vs_names(patterns=target.virtual_servers)
+            self.use_transport(client=client)
+            self.profiler.bind(target=target.hostname)
+            fortiview = self.get_fortiview(client=client, target=target)
             vs_names = fortiview.vs_names
 
             if len(vs_names) == 0:
@@ -251,44 +394,148 @@ class FortiAdcMetricScraper():
                 self.failed.set()
             else:
                 self.logger.info(msg=f"Starting to collect VirtualServers: {','.join(vs_names)}")
-            topics = [x.topic for x in target.scrape_configs]
             while True:
-                if 'vs_status' in topics:
-                    vs_status = fortiview.get_vs_status()
-                    self.enrich_metrics(metrics=vs_status, tags=target.tags)
-                    self.write(data=vs_status, measurement="virtualServerStatus")
-                if 'vs_http_stats' in topics:
-                    vs_http = fortiview.get_vs_http()
-                    self.enrich_metrics(metrics=vs_http, tags=target.tags)
-                    self.write(data=vs_http, measurement="virtualServerHttpStats")
-                # Number of seconds to sleep in each round
-                sleep_interval = 1
-                # Number of rounds
-                sleep_count = 0
-                while (sleep_interval * sleep_count) < target.scrape_interval:
-                    if self.terminate.is_set():
-                        self.logger.info(msg=f"Terminate Event is SET. Terminate Thread {current_thread().name}")
-                        return
-                    sleep_count += 1
-                    time.sleep(sleep_interval)
+                self.scrape_round(fortiview=fortiview, target=target)
+                if self.wait(interval=target.scrape_interval):
+                    return
+
+    def get_cluster_tags(self, cluster: str, targets: List[TargetConfig]) -> dict:
+        """
+        Tags for metrics scraped from a cluster, kept stable across failovers:
+        tags shared by all members (with the same value) plus `cluster`. Member `hostname` is dropped.
+        """
+        tags = dict(targets[0].tags)
+        for target in targets[1:]:
+            tags = {k: v for k, v in tags.items() if target.tags.get(k) == v}
+        tags.pop('hostname', None)
+        tags['cluster'] = cluster
+        return tags
+
+    def get_ha_state(self, target: TargetConfig) -> Optional[str]:
+        # Not profiled, member selection is not part of any scrape round
+        with self.get_client(conn_spec=self.get_conn_spec(target=target)) as client:
+            self.use_transport(client=client)
+            return FadcSystem(client=client, hostname=target.hostname).get_ha_state()
+
+    def find_active_member(self, cluster: str, targets: List[TargetConfig]) -> Optional[TargetConfig]:
+        """
+        Returns the member reporting HA state active. When no member reports it, falls back to the first
+        reachable member with unknown HA state. Standby members are never returned.
+        """
+        fallback = None
+        for target in targets:
+            try:
+                state = self.get_ha_state(target=target)
+            except Exception as e:
+                self.logger.error(msg=f"Cluster {cluster}: failed to get HA State of {target.hostname}. {repr(e)}")
+                continue
+            self.logger.debug(msg=f"Cluster {cluster}: {target.hostname} HA State is {state}")
+            if state == FadcSystem.ACTIVE:
+                return target
+            if state is None and fallback is None:
+                fallback = target
+        if fallback is not None:
+            self.logger.warning(msg=f"Cluster {cluster}: no member reports active HA State, using {fallback.hostname}")
+        return fallback
+
+    def cluster_worker(self, cluster: str, targets: List[TargetConfig]):
+        """
+        Scrapes only the active member of HA cluster. HA state of the active member is checked
+        at the start of every round, when it changes or the member stops returning metrics,
+        the worker waits one scrape interval and selects the active member again.
+        """
+        hostnames = [x.hostname for x in targets]
+        self.logger.info(msg=f"Starting metrics scraping on cluster {cluster} with members: {','.join(hostnames)}")
+        self.profiler.bind(target=cluster)
+        tags = self.get_cluster_tags(cluster=cluster, targets=targets)
+        activated = False
+        while not self.terminate.is_set():
+            target = self.find_active_member(cluster=cluster, targets=targets)
+            if target is None:
+                self.logger.error(msg=f"Cluster {cluster}: no active member found.")
+            else:
+                try:
+                    with self.get_client(conn_spec=self.get_conn_spec(target=target)) as client:
+                        self.use_transport(client=client)
+                        system = FadcSystem(client=client, hostname=target.hostname, profiler=self.profiler)
+                        fortiview = self.get_fortiview(client=client, target=target)
+                        if len(fortiview.vs_names) == 0:
+                            raise FadcMetricsException(f"Failed to obtain VirtualServers Names from {target.hostname}")
+                        self.logger.info(msg=f"Cluster {cluster}: active member is {target.hostname}. Collecting VirtualServers: {','.join(fortiview.vs_names)}")
+                        activated = True
+                        while not self.terminate.is_set():
+                            if self.scrape_round(fortiview=fortiview, target=target, tags=tags, system=system) == 0:
+                                self.logger.warning(msg=f"Cluster {cluster}: no metrics received from {target.hostname}")
+                                break
+                            if self.wait(interval=target.scrape_interval):
+                                return
+                except HaStateException as e:
+                    self.logger.warning(msg=f"Cluster {cluster}: {repr(e)}")
+                except Exception as e:
+                    self.logger.error(msg=f"Cluster {cluster}: member {target.hostname} failed. {repr(e)}")
+            if not activated:
+                self.logger.error(msg=f"Cluster {cluster}: failed to activate any member.")
+                self.terminate.set()
+                self.failed.set()
+                return
+            # Give the cluster one interval to settle before selecting the active member again
+            interval = target.scrape_interval if target is not None else targets[0].scrape_interval
+            if self.wait(interval=interval):
+                return
+        self.logger.info(msg=f"Terminate Event is SET. Terminate Thread {current_thread().name}")
+
+    def get_target_groups(self, targets: List[TargetConfig]) -> List[tuple]:
+        """
+        Groups targets by `cluster`. Targets without `cluster` form a group of their own.
+
+        :return: List of (cluster, targets) tuples, cluster is None for standalone targets
+        """
+        groups = {}
+        for i, target in enumerate(targets):
+            key = target.cluster if target.cluster is not None else i
+            groups.setdefault(key, []).append(target)
+        result = []
+        for key, members in groups.items():
+            if len(members) > 1:
+                for attr in ['scrape_interval', 'scrape_configs', 'virtual_servers']:
+                    if len(set(repr(getattr(x, attr)) for x in members)) > 1:
+                        self.logger.warning(msg=f"Cluster {key}: members differ in {attr}, using settings of the active member.")
+            result.append((key if isinstance(key, str) else None, members))
+        return result
 
     def run(self, targets):
         threads = []
-        for i, target in enumerate(targets):
-            threads.append(
-                Thread(
+        for i, (cluster, members) in enumerate(self.get_target_groups(targets=targets)):
+            if cluster is None:
+                thread = Thread(
                     target=self.worker,
-                    name=f"T-{i} {target.hostname}",
+                    name=f"T-{i} {members[0].hostname}",
                     daemon=True,
-                    kwargs={"target": target})
-            )
+                    kwargs={"target": members[0]}
+                )
+            else:
+                thread = Thread(
+                    target=self.cluster_worker,
+                    name=f"T-{i} {cluster}",
+                    daemon=True,
+                    kwargs={"cluster": cluster, "targets": members}
+                )
+            threads.append(thread)
         [t.start() for t in threads]
+        stats_interval = self.config.transport.pool_stats_interval
+        elapsed = 0
         # Wait while threads are alive
         while any([t.is_alive() for t in threads]):
             try:
                 time.sleep(1)
             except KeyboardInterrupt as e:
                 self.terminate.set()
+            elapsed += 1
+            if stats_interval and elapsed % stats_interval == 0:
+                self.log_pool_stats()
+        self.log_pool_stats()
+        self.transport.close()
+        self.profiler.close()
         if self.failed.is_set():
             self.logger.error(msg=f"FAILED Event is SET. Exiting with StatusCode=1")
             sys.exit(1)
@@ -2,8 +2,7 @@ import sys
 import pathlib
 import argparse
 from fadcmetrics.utils.logging import get_logger
-from fadcmetrics.config import FadcMetricsConfig, get_config
-from fadcmetrics.base import FortiAdcMetricScraper
+from fadcmetrics.config import FadcMetricsConfig, ProfileConfig, get_config
 
 CWD = pathlib.Path.cwd()
 
@@ -20,20 +19,76 @@ def to_path(path_str: str):
             raise argparse.ArgumentTypeError("Path does not exist")
     return path
 
+def positive_int(value: str):
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected integer, got {value}")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"Expected integer >= 1, got {number}")
+    return number
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="",
+    )
+    parser.add_argument(
+        '--config',
+        help='Path to config file',
+        type=to_path
+    )
+    parser.add_argument(
+        '--profile',
+        help='Record per-phase timing of the scrape pipeline and write report per target',
+        action='store_true',
+        dest='profile_enabled'
+    )
+    parser.add_argument(
+        '--profile-rounds',
+        help='Number of profiled scrape rounds per target (default: 1). Report of these rounds is written after them, '
+             'whole-run report is written to separate "-final" file on exit',
+        type=positive_int,
+        default=1
+    )
+    parser.add_argument(
+        '--profile-cpu',
+        help='Enable CPU profiling (cProfile) for the profiled rounds',
+        action='store_true'
+    )
+    parser.add_argument(
+        '--profile-memory',
+        help='Enable tracemalloc snapshots for the profiled rounds',
+        action='store_true'
+    )
+    parser.add_argument(
+        '--profile-output',
+        help='Directory for profile reports (default: current directory)',
+        type=pathlib.Path
+    )
+    return parser
+
+def get_profile_config(args: argparse.Namespace):
+    profile = None
+    if args.profile_enabled:
+        profile = ProfileConfig(
+            rounds=args.profile_rounds,
+            cpu=args.profile_cpu,
+            memory=args.profile_memory,
+            output=args.profile_output
+        )
+    return profile
+
+def parse_args(argv: list = None) -> argparse.Namespace:
+    args = get_parser().parse_args(argv)
+    args.profile = get_profile_config(args=args)
+    return args
+
 class FadcMetricsCli(object):
 
-    def __init__(self) -> None:
+    def __init__(self, argv: list = None) -> None:
         self.logger = get_logger(name=self.__class__.__name__)
         self.CONFIG: FadcMetricsConfig = None
-        parser = argparse.ArgumentParser(
-            description="",
-        )
-        parser.add_argument(
-            '--config',
-            help='Path to config file',
-            type=to_path
-        )
-        args = parser.parse_args()
+        args = parse_args(argv=argv)
         try:
             self.CONFIG = get_config(args=args)
         except Exception as e:
@@ -42,6 +97,8 @@ class FadcMetricsCli(object):
         self.run_scrapers()
 
     def run_scrapers(self):
+        # Imported here, so argument parsing does not require the ADC client
+        from fadcmetrics.base import FortiAdcMetricScraper
         scraper = FortiAdcMetricScraper(config=self.CONFIG)
         print(self.CONFIG.yaml())
         scraper.run(targets=self.CONFIG.targets)
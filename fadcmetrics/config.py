@@ -5,7 +5,7 @@ import yaml
 import re
 
 from argparse import Namespace
-from pydantic import BaseSettings, Field, AnyHttpUrl, validator, root_validator
+from pydantic import BaseSettings, Field, AnyHttpUrl, conint, validator, root_validator
 from typing import Pattern
 from pydantic.typing import Any, Dict, List, Literal, Optional, Union
 from fadcmetrics.utils.logging import get_logger
@@ -87,6 +87,23 @@ class HttpWriterConfig(WriterConfig):
     method: Literal['POST']
 
 
+class TransportConfig(ConfigBase):
+
+    pool_connections: Optional[int]
+    pool_maxsize: Optional[int]
+    pool_block: bool = False
+    pool_stats_interval: Optional[int] = 300
+
+
+class ProfileConfig(ConfigBase):
+
+    enabled: bool = True
+    rounds: conint(ge=1) = 1
+    cpu: bool = False
+    memory: bool = False
+    output: Optional[pathlib.Path]
+
+
 class ScrapeConfig(ConfigBase):
     topic: Literal['vs_status', 'vs_http_stats']
     tags: Optional[Dict[str, str]]
@@ -103,6 +120,7 @@ class TargetConfig(ConfigBase):
     scrape_configs: List[ScrapeConfig]
     virtual_servers: Optional[List[Pattern]]
     tags: Optional[Dict[str, str]]
+    cluster: Optional[str]
 
     @validator('virtual_servers', pre=True)
     def compile_virtual_server_regexes(cls, field):
@@ -119,6 +137,8 @@ class TargetConfig(ConfigBase):
             tags = dict()
         if tags.get('hostname') is None:
             tags['hostname'] = values.get('hostname')
+        if values.get('cluster') is not None and tags.get('cluster') is None:
+            tags['cluster'] = values.get('cluster')
         values['tags'] = tags
         return values
 
@@ -126,6 +146,8 @@ class FadcMetricsConfig(ConfigBase):
 
     targets: List[TargetConfig]
     writers: List[Union[FileWriterConfig, HttpWriterConfig]]
+    transport: TransportConfig = Field(default_factory=TransportConfig)
+    profile: Optional[ProfileConfig]
 
 def get_config(args: Union[Dict, Namespace] = Namespace()):
     global LOGGER
@@ -3,4 +3,8 @@ class FadcMetricsException(Exception):
 
 
 class HttpWriterException(FadcMetricsException):
+    pass
+
+
+class HaStateException(FadcMetricsException):
     pass
\ No newline at end of file
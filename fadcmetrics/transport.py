@@ -0,0 +1,165 @@
+import weakref
+from collections import defaultdict
+from threading import Lock
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from fadcmetrics.utils.logging import get_logger
+
+
+class RequestStats(object):
+    """
+    Thread-safe per-host request counters, shared by all adapters of a transport.
+    """
+
+    def __init__(self) -> None:
+        self.lock = Lock()
+        self.hosts = defaultdict(lambda: {"requests": 0, "errors": 0, "elapsed": 0.0})
+
+    def add(self, host: str, elapsed: float = 0.0, error: bool = False):
+        with self.lock:
+            self.hosts[host]["requests"] += 1
+            if error:
+                self.hosts[host]["errors"] += 1
+            else:
+                self.hosts[host]["elapsed"] += elapsed
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {host: dict(counters) for host, counters in self.hosts.items()}
+
+
+def host_key(url: str) -> str:
+    parsed = urlparse(url)
+    port = parsed.port or (443 if parsed.scheme == "https" else 80)
+    return f"{parsed.hostname}:{port}"
+
+
+class PoolStatsAdapter(HTTPAdapter):
+    """
+    HTTPAdapter which records per-host request counters into shared :class:`RequestStats`.
+    """
+
+    def __init__(self, *args, stats: RequestStats = None, **kwargs):
+        self.stats = stats if stats is not None else RequestStats()
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, *args, **kwargs):
+        host = host_key(url=request.url)
+        try:
+            response = super().send(request, *args, **kwargs)
+        except Exception:
+            self.stats.add(host=host, error=True)
+            raise
+        self.stats.add(host=host, elapsed=response.elapsed.total_seconds())
+        return response
+
+    def connection_stats(self) -> dict:
+        stats = {}
+        pools = self.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            host = f"{pool.host}:{pool.port}"
+            idle = pool.pool.qsize() if pool.pool is not None else 0
+            entry = stats.setdefault(host, {"pools": 0, "connections": 0, "idle": 0, "pool_requests": 0})
+            entry["pools"] += 1
+            entry["connections"] += pool.num_connections
+            entry["idle"] += idle
+            entry["pool_requests"] += pool.num_requests
+        return stats
+
+
+class HttpTransport(object):
+    """
+    Shared HTTP transport for scraper workers and writers.
+
+    Sessions returned by :meth:`get_session` share single keep-alive pool.
+    Sessions owned by someone else (e.g. API clients, which close them on exit) are handled by
+    :meth:`mount_client`, which gives them their own adapter, so closing them does not drop the shared pools.
+    All adapters report into the same per-host statistics.
+
+    :param int pool_connections: Number of per-host pools to keep
+    :param int pool_maxsize: Maximum number of connections kept alive per host
+    :param bool pool_block: Block when pool is exhausted instead of opening throwaway connections
+    """
+
+    def __init__(self, pool_connections: int = 10, pool_maxsize: int = 10, pool_block: bool = False):
+        self.logger = get_logger(name=self.__class__.__name__)
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.stats = RequestStats()
+        self.adapters = weakref.WeakSet()
+        self.adapter = self.get_adapter()
+
+    def get_adapter(self, max_retries=0) -> PoolStatsAdapter:
+        adapter = PoolStatsAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=self.pool_block,
+            max_retries=max_retries,
+            stats=self.stats
+        )
+        self.adapters.add(adapter)
+        return adapter
+
+    def mount(self, session: requests.Session, adapter: PoolStatsAdapter = None) -> requests.Session:
+        adapter = adapter if adapter is not None else self.adapter
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def mount_client(self, session: requests.Session) -> bool:
+        """
+        Replaces plain HTTPAdapters of a session owned by someone else with own :class:`PoolStatsAdapter`,
+        keeping their `max_retries`. Customized adapters (subclasses, e.g. with TLS options) are left in place.
+
+        :return: True if any adapter was replaced
+        """
+        adapter = None
+        for prefix in ("https://", "http://"):
+            current = session.adapters.get(prefix)
+            if current is not None and type(current) is not HTTPAdapter:
+                self.logger.debug(msg=f"Keeping custom adapter {type(current).__name__} for {prefix}")
+                continue
+            if adapter is None:
+                max_retries = current.max_retries if current is not None else 0
+                adapter = self.get_adapter(max_retries=max_retries)
+            session.mount(prefix, adapter)
+        return adapter is not None
+
+    def get_session(self, headers: dict = None) -> requests.Session:
+        session = self.mount(session=requests.Session())
+        if headers is not None:
+            session.headers.update(headers)
+        return session
+
+    def pool_stats(self) -> dict:
+        stats = {}
+        for adapter in list(self.adapters):
+            for host, counters in adapter.connection_stats().items():
+                entry = stats.setdefault(host, {"pools": 0, "connections": 0, "idle": 0, "pool_requests": 0})
+                for key, value in counters.items():
+                    entry[key] += value
+        for host, counters in self.stats.snapshot().items():
+            stats.setdefault(host, {"pools": 0, "connections": 0, "idle": 0, "pool_requests": 0}).update(counters)
+        return stats
+
+    def close(self):
+        for adapter in list(self.adapters):
+            adapter.close()
+
+    @classmethod
+    def from_config(cls, config, concurrency: int = 1, hosts: int = 1):
+        """
+        Build transport with pool sizes derived from configured concurrency unless set explicitly.
+
+        :param TransportConfig config: Transport section of the config
+        :param int concurrency: Number of threads sending requests through the transport
+        :param int hosts: Number of distinct hosts the transport talks to
+        """
+        pool_connections = config.pool_connections or max(hosts, 1)
+        pool_maxsize = config.pool_maxsize or max(concurrency, 1)
+        return cls(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=config.pool_block)
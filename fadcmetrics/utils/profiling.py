@@ -0,0 +1,218 @@
+import io
+import time
+import pstats
+import cProfile
+import pathlib
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from threading import Lock, local, current_thread
+from fadcmetrics.utils.logging import get_logger
+
+NULL_SPAN = nullcontext()
+
+
+class PhaseStats(object):
+
+    __slots__ = ("count", "total", "max")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, elapsed: float):
+        self.count += 1
+        self.total += elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+
+
+class Profiler(object):
+    """
+    Collects timing spans of scrape pipeline phases per target.
+
+    Optionally runs cProfile and tracemalloc for the first ``rounds`` scrape rounds of each target.
+    Tracing starts with the first profiled round and stops once every bound target has completed ``rounds`` rounds.
+    When disabled, :meth:`span` returns a shared no-op context, so instrumented code pays almost nothing.
+
+    :param bool enabled: Enables timing spans
+    :param int rounds: Number of rounds after which the report is written and CPU/memory profiling stops.
+        Timing spans keep being recorded, the whole-run report is written by :meth:`close` to a separate ``-final`` file
+    :param bool cpu: Enables CPU profiling with cProfile
+    :param bool memory: Enables tracemalloc snapshots
+    :param pathlib.Path output: Directory for reports
+    """
+
+    def __init__(self, enabled: bool = False, rounds: int = 1, cpu: bool = False, memory: bool = False, output: pathlib.Path = None) -> None:
+        if rounds < 1:
+            raise ValueError(f"Profiler rounds must be >= 1, got {rounds}")
+        self.enabled = enabled
+        self.rounds = rounds
+        self.cpu = cpu and enabled
+        self.memory = memory and enabled
+        self.output = output if output is not None else pathlib.Path.cwd()
+        self.logger = get_logger(name=self.__class__.__name__, with_threads=True)
+        self.lock = Lock()
+        self.local = local()
+        self.phases = {}
+        self.round_counts = {}
+        self.cpu_profiles = {}
+        self.snapshots = {}
+        self.targets = set()
+        self.tracing = False
+
+    @classmethod
+    def from_config(cls, config):
+        if config is None:
+            return cls(enabled=False)
+        return cls(enabled=config.enabled, rounds=config.rounds, cpu=config.cpu, memory=config.memory, output=config.output)
+
+    @property
+    def target(self) -> str:
+        return getattr(self.local, "target", None) or current_thread().name
+
+    def bind(self, target: str):
+        # Spans recorded in the calling thread will be accounted to this target
+        self.local.target = target
+        with self.lock:
+            self.targets.add(target)
+
+    def start_tracing(self):
+        with self.lock:
+            if not self.tracing and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self.tracing = True
+
+    def stop_tracing(self, force: bool = False):
+        # Only stop tracing started by the Profiler, once no target is left in its profiled rounds
+        with self.lock:
+            if not self.tracing:
+                return
+            if force or all(self.round_counts.get(x, 0) >= self.rounds for x in self.targets):
+                tracemalloc.stop()
+                self.tracing = False
+
+    def record(self, phase: str, elapsed: float):
+        target = self.target
+        with self.lock:
+            phases = self.phases.setdefault(target, {})
+            stats = phases.get(phase)
+            if stats is None:
+                stats = phases[phase] = PhaseStats()
+            stats.add(elapsed)
+
+    @contextmanager
+    def _span(self, phase: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(phase=phase, elapsed=time.perf_counter() - start)
+
+    def span(self, phase: str):
+        if not self.enabled:
+            return NULL_SPAN
+        return self._span(phase=phase)
+
+    @contextmanager
+    def _round(self):
+        target = self.target
+        number = self.round_counts.get(target, 0)
+        profiling = number < self.rounds
+        cpu_profile = None
+        if profiling and self.memory:
+            self.start_tracing()
+        if profiling and self.cpu:
+            cpu_profile = self.cpu_profiles.setdefault(target, cProfile.Profile())
+            try:
+                cpu_profile.enable()
+            except ValueError as e:
+                # Python 3.12+ allows single active profiler, another target's round is being profiled
+                self.logger.warning(msg=f"Skipping CPU profile of round {number} for {target}. {repr(e)}")
+                cpu_profile = None
+        try:
+            with self._span(phase="round"):
+                yield
+        finally:
+            if cpu_profile is not None:
+                cpu_profile.disable()
+            if profiling and self.memory and tracemalloc.is_tracing():
+                self.snapshots.setdefault(target, []).append(tracemalloc.take_snapshot())
+            self.round_counts[target] = number + 1
+            if number + 1 == self.rounds:
+                self.write_report(target=target)
+                if self.memory:
+                    self.stop_tracing()
+
+    def round(self):
+        """
+        Wraps single scrape round of the calling thread's target.
+        """
+        if not self.enabled:
+            return NULL_SPAN
+        return self._round()
+
+    def format_report(self, target: str) -> str:
+        with self.lock:
+            phases = {k: (v.count, v.total, v.max) for k, v in self.phases.get(target, {}).items()}
+        rounds = self.round_counts.get(target, 0)
+        round_total = phases.get("round", (0, 0.0, 0.0))[1]
+        lines = [
+            f"Target: {target}",
+            f"Rounds: {rounds}",
+            "",
+            f"{'phase':<16}{'count':>8}{'total [s]':>14}{'mean [ms]':>12}{'max [ms]':>12}{'% round':>10}"
+        ]
+        for phase, (count, total, max_) in sorted(phases.items(), key=lambda x: x[1][1], reverse=True):
+            mean = (total / count) * 1000 if count else 0.0
+            share = (total / round_total) * 100 if round_total else 0.0
+            lines.append(f"{phase:<16}{count:>8}{total:>14.4f}{mean:>12.2f}{max_ * 1000:>12.2f}{share:>10.1f}")
+
+        cpu_profile = self.cpu_profiles.get(target)
+        if cpu_profile is not None:
+            stream = io.StringIO()
+            pstats.Stats(cpu_profile, stream=stream).sort_stats("cumulative").print_stats(25)
+            lines.extend(["", "CPU Profile (top 25 by cumulative time):", stream.getvalue()])
+
+        snapshots = self.snapshots.get(target, [])
+        if len(snapshots) > 1:
+            lines.extend(["", f"Memory: top allocations growth over {len(snapshots)} rounds:"])
+            for stat in snapshots[-1].compare_to(snapshots[0], "lineno")[:15]:
+                lines.append(str(stat))
+        elif len(snapshots) == 1:
+            lines.extend(["", "Memory: top allocations:"])
+            for stat in snapshots[0].statistics("lineno")[:15]:
+                lines.append(str(stat))
+        return "\n".join(lines) + "\n"
+
+    def get_report_path(self, target: str, final: bool = False) -> pathlib.Path:
+        file_name = "".join(c if c.isalnum() or c in "-_." else "_" for c in target)
+        suffix = "-final" if final else ""
+        return self.output.joinpath(f"fadcmetrics-profile-{file_name}{suffix}.txt")
+
+    def write_report(self, target: str = None, final: bool = False):
+        """
+        Writes report of the profiled rounds, or with `final` the whole-run report to a separate file.
+        """
+        target = target or self.target
+        report = self.format_report(target=target)
+        path = self.get_report_path(target=target, final=final)
+        try:
+            self.output.mkdir(parents=True, exist_ok=True)
+            path.write_text(report)
+            self.logger.info(msg=f"Profile report for {target} written to {path}")
+        except Exception as e:
+            self.logger.error(msg=f"Failed to write profile report to {path}. {repr(e)}")
+        cpu_profile = self.cpu_profiles.get(target)
+        if cpu_profile is not None and not final:
+            try:
+                cpu_profile.dump_stats(str(path.with_suffix(".prof")))
+            except Exception as e:
+                self.logger.error(msg=f"Failed to dump CPU profile for {target}. {repr(e)}")
+
+    def close(self):
+        if not self.enabled:
+            return
+        for target in list(self.phases.keys()):
+            self.write_report(target=target, final=True)
+        self.stop_tracing(force=True)
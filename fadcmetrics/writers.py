@@ -1,16 +1,19 @@
 import json
 from socket import MsgFlag
-from threading import Lock
+from threading import Lock, local
 import urllib3
 import requests
 from fadcmetrics.utils.logging import get_logger
 from fadcmetrics.config import FileWriterConfig, HttpWriterConfig
 from fadcmetrics.exceptions import *
+from fadcmetrics.transport import HttpTransport
+from fadcmetrics.utils.profiling import Profiler
 class BaseWriter(object):
 
-    def __init__(self, encoding='json'):
+    def __init__(self, encoding='json', profiler: Profiler = None):
         self.lock = Lock()
         self.encoding = encoding
+        self.profiler = profiler if profiler is not None else Profiler()
         self.logger = get_logger(name=self.__class__.__name__)
 
     def prepare_json_output(self, data) -> dict:
@@ -53,12 +56,13 @@ class BaseWriter(object):
         return result
     
     @classmethod
-    def from_config(config):
+    def from_config(cls, config, transport: HttpTransport = None, profiler: Profiler = None):
         raise NotImplemented
 
     def serialize(self, data):
         if self.encoding == 'json':
-            return self.to_json(data=data)
+            with self.profiler.span("serialize"):
+                return self.to_json(data=data)
 
     def write(self, data: dict):
         raise NotImplemented
@@ -68,22 +72,33 @@ class StdoutWriter(BaseWriter):
     def write(self, data: dict, measurement: str = ""):
         serial_data = self.serialize(data=data)
         if serial_data is not None:
-            with self.lock:
+            with self.lock, self.profiler.span("write"):
                 print(serial_data)
 
 class HttpWriter(BaseWriter):
 
-    def __init__(self, url: str, method: str, encoding='json'):
+    def __init__(self, url: str, method: str, encoding='json', transport: HttpTransport = None, profiler: Profiler = None):
         self.url = url
         self.method = method
-        self.session = self.get_session()
-        super().__init__(encoding)
+        self.transport = transport
+        self.local = local()
+        super().__init__(encoding=encoding, profiler=profiler)
+
+    @property
+    def session(self):
+        # Each thread gets own Session, with transport they all share the same connection pool
+        session = getattr(self.local, 'session', None)
+        if session is None:
+            session = self.local.session = self.get_session()
+        return session
 
     def get_session(self):
-        session = requests.Session()
         headers = {
             "Content-Type": "application/json"
         }
+        if self.transport is not None:
+            return self.transport.get_session(headers=headers)
+        session = requests.Session()
         session.headers.update(headers)
         return session
 
@@ -101,16 +116,20 @@ class HttpWriter(BaseWriter):
         # print(data)
         if not isinstance(data, str):
             raise ValueError(f"Error while writing data. Expected JSON str, got {type(data)}")
-        with self.lock:
-            try: 
-                self.session.request(method=self.method, url=self.url, data=data)
-            except urllib3.exceptions.NewConnectionError as e:
-                self.logger.error(msg=f"ERROR: Could not establish connection to {self.url}. {repr(e)}")
-                raise HttpWriterException
-            except Exception as e:
-                self.logger.error(msg=f"ERROR: Unhandled Exception. {repr(e)}")
-                raise HttpWriterException
+        try:
+            if self.transport is not None:
+                with self.profiler.span("write"):
+                    self.session.request(method=self.method, url=self.url, data=data)
+            else:
+                with self.lock, self.profiler.span("write"):
+                    self.session.request(method=self.method, url=self.url, data=data)
+        except urllib3.exceptions.NewConnectionError as e:
+            self.logger.error(msg=f"ERROR: Could not establish connection to {self.url}. {repr(e)}")
+            raise HttpWriterException
+        except Exception as e:
+            self.logger.error(msg=f"ERROR: Unhandled Exception. {repr(e)}")
+            raise HttpWriterException
 
     @classmethod
-    def from_config(cls, config: HttpWriterConfig):
-        return cls(url=config.url, method=config.method)
+    def from_config(cls, config: HttpWriterConfig, transport: HttpTransport = None, profiler: Profiler = None):
+        return cls(url=config.url, method=config.method, transport=transport, profiler=profiler)
@@ -1,7 +1,69 @@
-from fadcmetrics.cli import FadcMetricsCli
+import pathlib
+import tempfile
+import unittest
+from contextlib import redirect_stderr
+from io import StringIO
+from fadcmetrics.cli import FadcMetricsCli, parse_args
+from fadcmetrics.config import ProfileConfig, get_config
+
+CONFIG = """
+config:
+  targets:
+    - hostname: adc-1
+      base_url: https://adc-1.example
+      username: admin
+      password: secret
+      scrape_interval: 10
+      scrape_configs:
+        - topic: vs_status
+  writers:
+    - type: http
+      url: http://writer.example:8080/
+      method: POST
+"""
+
+
+class TestCliArgs(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.config_path = pathlib.Path(self.tmp.name).joinpath("fadcmetrics.yml")
+        self.config_path.write_text(CONFIG)
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_profile_disabled_by_default(self):
+        args = parse_args(argv=["--config", str(self.config_path)])
+        self.assertIsNone(args.profile)
+        self.assertIsNone(get_config(args=args).profile)
+
+    def test_profile_flags_to_config(self):
+        args = parse_args(argv=[
+            "--config", str(self.config_path),
+            "--profile",
+            "--profile-rounds", "3",
+            "--profile-cpu",
+            "--profile-memory",
+            "--profile-output", self.tmp.name
+        ])
+        config = get_config(args=args)
+        self.assertIsInstance(config.profile, ProfileConfig)
+        self.assertTrue(config.profile.enabled)
+        self.assertEqual(config.profile.rounds, 3)
+        self.assertTrue(config.profile.cpu)
+        self.assertTrue(config.profile.memory)
+        self.assertEqual(config.profile.output, pathlib.Path(self.tmp.name))
+
+    def test_profile_rounds_rejected_below_one(self):
+        for value in ["0", "-1", "abc"]:
+            with self.subTest(value=value), redirect_stderr(StringIO()):
+                with self.assertRaises(SystemExit):
+                    parse_args(argv=["--profile", "--profile-rounds", value])
+
 
 def main():
     FadcMetricsCli()
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,172 @@
+import importlib.util
+import unittest
+from fadcmetrics.config import FadcMetricsConfig
+
+HAS_FADCCLIENT = importlib.util.find_spec("fadcclient") is not None
+if HAS_FADCCLIENT:
+    from fadcmetrics.base import FadcSystem, FortiAdcMetricScraper
+
+
+class FakeCluster(object):
+    """
+    HA states of fake FortiADCs, keyed by base_url. Members in `unreachable` raise on every request.
+    """
+
+    def __init__(self, states: dict) -> None:
+        self.states = states
+        self.unreachable = set()
+        self.ha_payloads = {}
+
+
+class FakeClient(object):
+
+    def __init__(self, cluster: FakeCluster, base_url: str) -> None:
+        self.cluster = cluster
+        self.base_url = base_url
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def send_request(self, method, path, params=None):
+        if self.base_url in self.cluster.unreachable:
+            raise ConnectionError(f"{self.base_url} is unreachable")
+        return path
+
+    def handle_response(self, response):
+        if response == FadcSystem.HA_STATUS_PATH:
+            payload = self.cluster.ha_payloads.get(self.base_url)
+            if payload is None:
+                payload = {FadcSystem.HA_STATE_KEY: self.cluster.states[self.base_url]}
+            return False, None, payload
+        if response.endswith("get_vs_name_options"):
+            return False, None, ["vs1"]
+        if response.endswith("get_trees"):
+            return False, None, []
+        if response.endswith("vs_status"):
+            return False, None, {"member": self.base_url}
+        return True, "Not Found", None
+
+
+def make_config(members: list, cluster: str = "c1", tags: dict = None) -> FadcMetricsConfig:
+    targets = []
+    for hostname in members:
+        member_tags = dict(tags or {})
+        member_tags["member"] = hostname
+        targets.append({
+            "hostname": hostname,
+            "base_url": hostname,
+            "username": "admin",
+            "password": "secret",
+            "scrape_interval": 1,
+            "scrape_configs": [{"topic": "vs_status"}],
+            "cluster": cluster,
+            "tags": member_tags
+        })
+    return FadcMetricsConfig.parse_obj({"targets": targets, "writers": []})
+
+
+@unittest.skipUnless(HAS_FADCCLIENT, "fadcclient is not installed")
+class TestFadcSystem(unittest.TestCase):
+
+    def get_state(self, payload):
+        cluster = FakeCluster(states={})
+        cluster.ha_payloads["adc-1"] = payload
+        return FadcSystem(client=FakeClient(cluster=cluster, base_url="adc-1"), hostname="adc-1").get_ha_state()
+
+    def test_state_mapping(self):
+        self.assertEqual(self.get_state({"state": "active"}), FadcSystem.ACTIVE)
+        self.assertEqual(self.get_state({"state": "Standby"}), FadcSystem.STANDBY)
+        self.assertEqual(self.get_state([{"state": "active"}]), FadcSystem.ACTIVE)
+
+    def test_unknown_state(self):
+        self.assertIsNone(self.get_state({"state": "master"}))
+        self.assertIsNone(self.get_state({"status": "active", "role": "standby"}))
+        self.assertIsNone(self.get_state([]))
+        self.assertIsNone(self.get_state("active"))
+
+
+@unittest.skipUnless(HAS_FADCCLIENT, "fadcclient is not installed")
+class TestClusterWorker(unittest.TestCase):
+
+    def get_scraper(self, config: FadcMetricsConfig, cluster: FakeCluster, actions: list = None):
+        """
+        Scraper with fake clients. `wait` runs next action from `actions` and terminates when none is left.
+        """
+        scraper = FortiAdcMetricScraper(config=config)
+        scraper.get_client = lambda conn_spec: FakeClient(cluster=cluster, base_url=conn_spec["base_url"])
+        scraper.written = []
+        scraper.write = lambda data, measurement="": scraper.written.extend(data)
+        actions = list(actions or [])
+
+        def wait(interval):
+            if not actions:
+                return True
+            actions.pop(0)()
+            return False
+
+        scraper.wait = wait
+        return scraper
+
+    def test_target_groups(self):
+        config = make_config(members=["adc-1", "adc-2"])
+        standalone = make_config(members=["adc-3"], cluster=None)
+        scraper = FortiAdcMetricScraper(config=config)
+        groups = scraper.get_target_groups(targets=config.targets + standalone.targets)
+        self.assertEqual([(c, [x.hostname for x in m]) for c, m in groups], [("c1", ["adc-1", "adc-2"]), (None, ["adc-3"])])
+
+    def test_cluster_tags(self):
+        config = make_config(members=["adc-1", "adc-2"], tags={"site": "prague"})
+        tags = FortiAdcMetricScraper(config=config).get_cluster_tags(cluster="c1", targets=config.targets)
+        self.assertEqual(tags, {"site": "prague", "cluster": "c1"})
+
+    def test_failover_on_ha_state_change(self):
+        config = make_config(members=["adc-1", "adc-2"], tags={"site": "prague"})
+        cluster = FakeCluster(states={"adc-1": "active", "adc-2": "standby"})
+
+        def failover():
+            cluster.states.update({"adc-1": "standby", "adc-2": "active"})
+
+        # wait #1 after first round fails over, wait #2 is the settle interval, wait #3 follows round on adc-2
+        scraper = self.get_scraper(config=config, cluster=cluster, actions=[failover, lambda: None, lambda: None])
+        scraper.cluster_worker(cluster="c1", targets=config.targets)
+        self.assertEqual([x["member"] for x in scraper.written], ["adc-1", "adc-2", "adc-2"])
+        tags = [x["tags"] for x in scraper.written]
+        self.assertTrue(all(x == tags[0] for x in tags))
+        self.assertEqual(tags[0], {"virtualServerName": "vs1", "site": "prague", "cluster": "c1"})
+        self.assertFalse(scraper.failed.is_set())
+
+    def test_never_scrapes_standby(self):
+        config = make_config(members=["adc-1", "adc-2"])
+        cluster = FakeCluster(states={"adc-1": "standby", "adc-2": "standby"})
+        scraper = FortiAdcMetricScraper(config=config)
+        scraper.get_client = lambda conn_spec: FakeClient(cluster=cluster, base_url=conn_spec["base_url"])
+        self.assertIsNone(scraper.find_active_member(cluster="c1", targets=config.targets))
+
+    def test_unknown_state_fallback(self):
+        config = make_config(members=["adc-1", "adc-2", "adc-3"])
+        cluster = FakeCluster(states={"adc-1": "standby", "adc-2": "unknown", "adc-3": "unknown"})
+        scraper = self.get_scraper(config=config, cluster=cluster)
+        self.assertEqual(scraper.find_active_member(cluster="c1", targets=config.targets).hostname, "adc-2")
+        scraper.cluster_worker(cluster="c1", targets=config.targets)
+        self.assertEqual([x["member"] for x in scraper.written], ["adc-2"])
+
+    def test_all_members_unreachable(self):
+        config = make_config(members=["adc-1", "adc-2"])
+        cluster = FakeCluster(states={"adc-1": "active", "adc-2": "standby"})
+        cluster.unreachable.update({"adc-1", "adc-2"})
+        scraper = self.get_scraper(config=config, cluster=cluster, actions=[lambda: None])
+        scraper.cluster_worker(cluster="c1", targets=config.targets)
+        self.assertTrue(scraper.failed.is_set())
+        self.assertTrue(scraper.terminate.is_set())
+        self.assertEqual(scraper.written, [])
+
+    def test_terminate_stops_worker(self):
+        config = make_config(members=["adc-1", "adc-2"])
+        cluster = FakeCluster(states={"adc-1": "active", "adc-2": "standby"})
+        scraper = self.get_scraper(config=config, cluster=cluster)
+        scraper.terminate.set()
+        scraper.cluster_worker(cluster="c1", targets=config.targets)
+        self.assertEqual(scraper.written, [])
@@ -0,0 +1,115 @@
+import pathlib
+import tempfile
+import threading
+import tracemalloc
+import unittest
+from fadcmetrics.config import ProfileConfig
+from fadcmetrics.utils.profiling import Profiler, NULL_SPAN
+
+
+class TestProfiler(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.output = pathlib.Path(self.tmp.name)
+
+    def tearDown(self) -> None:
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.tmp.cleanup()
+
+    def test_disabled_is_noop(self):
+        profiler = Profiler(output=self.output)
+        self.assertIs(profiler.span("api"), NULL_SPAN)
+        self.assertIs(profiler.round(), NULL_SPAN)
+        with profiler.round():
+            with profiler.span("api"):
+                pass
+        profiler.close()
+        self.assertEqual(profiler.phases, {})
+        self.assertEqual(list(self.output.iterdir()), [])
+
+    def test_from_config_none_is_disabled(self):
+        self.assertFalse(Profiler.from_config(config=None).enabled)
+
+    def test_invalid_rounds(self):
+        with self.assertRaises(ValueError):
+            Profiler(enabled=True, rounds=0)
+        with self.assertRaises(ValueError):
+            ProfileConfig(rounds=0)
+
+    def test_bind_attributes_spans_to_target(self):
+        profiler = Profiler(enabled=True, rounds=10, output=self.output)
+
+        def work(target: str, count: int):
+            profiler.bind(target=target)
+            for _ in range(count):
+                with profiler.span("api"):
+                    pass
+
+        threads = [
+            threading.Thread(target=work, kwargs={"target": "adc-1", "count": 2}),
+            threading.Thread(target=work, kwargs={"target": "adc-2", "count": 3})
+        ]
+        [t.start() for t in threads]
+        [t.join() for t in threads]
+        self.assertEqual(profiler.phases["adc-1"]["api"].count, 2)
+        self.assertEqual(profiler.phases["adc-2"]["api"].count, 3)
+
+    def test_report_written_after_rounds(self):
+        profiler = Profiler(enabled=True, rounds=2, cpu=True, output=self.output)
+        profiler.bind(target="adc-1")
+        report = self.output.joinpath("fadcmetrics-profile-adc-1.txt")
+        with profiler.round():
+            with profiler.span("api"):
+                pass
+        self.assertFalse(report.exists())
+        with profiler.round():
+            with profiler.span("api"):
+                pass
+        self.assertTrue(report.exists())
+        self.assertTrue(report.with_suffix(".prof").exists())
+        text = report.read_text()
+        self.assertIn("Rounds: 2", text)
+        self.assertIn("api", text)
+
+    def test_tracing_limited_to_profiled_rounds(self):
+        profiler = Profiler(enabled=True, rounds=2, memory=True, output=self.output)
+        self.assertFalse(tracemalloc.is_tracing())
+        profiler.bind(target="adc-1")
+        profiler.bind(target="adc-2")
+        for target in ["adc-1", "adc-2"]:
+            profiler.bind(target=target)
+            with profiler.round():
+                self.assertTrue(tracemalloc.is_tracing())
+        profiler.bind(target="adc-1")
+        with profiler.round():
+            pass
+        # adc-2 is still within its profiled rounds
+        self.assertTrue(tracemalloc.is_tracing())
+        profiler.bind(target="adc-2")
+        with profiler.round():
+            pass
+        self.assertFalse(tracemalloc.is_tracing())
+        self.assertEqual(len(profiler.snapshots["adc-1"]), 2)
+        self.assertIn("Memory:", self.output.joinpath("fadcmetrics-profile-adc-2.txt").read_text())
+
+    def test_final_report_does_not_replace_rounds_report(self):
+        profiler = Profiler(enabled=True, rounds=1, output=self.output)
+        profiler.bind(target="adc-1")
+        for _ in range(3):
+            with profiler.round():
+                pass
+        profiler.close()
+        self.assertIn("Rounds: 1", self.output.joinpath("fadcmetrics-profile-adc-1.txt").read_text())
+        self.assertIn("Rounds: 3", self.output.joinpath("fadcmetrics-profile-adc-1-final.txt").read_text())
+
+    def test_close_stops_tracing(self):
+        profiler = Profiler(enabled=True, rounds=5, memory=True, output=self.output)
+        profiler.bind(target="adc-1")
+        with profiler.round():
+            pass
+        self.assertTrue(tracemalloc.is_tracing())
+        profiler.close()
+        self.assertFalse(tracemalloc.is_tracing())
+        self.assertTrue(self.output.joinpath("fadcmetrics-profile-adc-1-final.txt").exists())
@@ -0,0 +1,154 @@
+import time
+import datetime
+import threading
+import unittest
+from unittest import mock
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from fadcmetrics.config import TransportConfig
+from fadcmetrics.transport import HttpTransport, PoolStatsAdapter
+from fadcmetrics.writers import HttpWriter
+
+
+def fake_response(request, elapsed: float = 0.01):
+    response = requests.Response()
+    response.status_code = 204
+    response.request = request
+    response.url = request.url
+    response.elapsed = datetime.timedelta(seconds=elapsed)
+    return response
+
+
+class TestHttpTransport(unittest.TestCase):
+
+    def test_pool_size_from_concurrency(self):
+        transport = HttpTransport.from_config(config=TransportConfig(), concurrency=4, hosts=6)
+        self.assertEqual(transport.pool_maxsize, 4)
+        self.assertEqual(transport.pool_connections, 6)
+        self.assertEqual(transport.adapter._pool_maxsize, 4)
+        self.assertEqual(transport.adapter._pool_connections, 6)
+
+    def test_pool_size_override(self):
+        config = TransportConfig(pool_connections=2, pool_maxsize=16, pool_block=True)
+        transport = HttpTransport.from_config(config=config, concurrency=4, hosts=6)
+        self.assertEqual(transport.pool_maxsize, 16)
+        self.assertEqual(transport.pool_connections, 2)
+        self.assertTrue(transport.adapter._pool_block)
+
+    def test_pool_size_minimum(self):
+        transport = HttpTransport.from_config(config=TransportConfig(), concurrency=0, hosts=0)
+        self.assertEqual(transport.pool_maxsize, 1)
+        self.assertEqual(transport.pool_connections, 1)
+
+    def test_stats_count_success_and_errors(self):
+        transport = HttpTransport()
+        session = transport.get_session()
+        calls = iter([None, None, requests.ConnectionError("down")])
+
+        def send(adapter, request, *args, **kwargs):
+            error = next(calls)
+            if error is not None:
+                raise error
+            return fake_response(request=request, elapsed=0.5)
+
+        with mock.patch.object(HTTPAdapter, "send", send):
+            session.get("http://writer.example:8080/")
+            session.get("http://writer.example:8080/")
+            with self.assertRaises(requests.ConnectionError):
+                session.get("http://writer.example:8080/")
+        stats = transport.pool_stats()["writer.example:8080"]
+        self.assertEqual(stats["requests"], 3)
+        self.assertEqual(stats["errors"], 1)
+        self.assertAlmostEqual(stats["elapsed"], 1.0)
+
+    def test_default_port_host_key(self):
+        transport = HttpTransport()
+        with mock.patch.object(HTTPAdapter, "send", lambda adapter, request, *a, **kw: fake_response(request)):
+            transport.get_session().get("https://adc.example/api")
+        self.assertIn("adc.example:443", transport.pool_stats())
+
+    def test_client_adapter_close_keeps_shared_pool(self):
+        transport = HttpTransport()
+        pool = transport.adapter.poolmanager.connection_from_url("http://writer.example:8080/")
+        client_session = transport.mount(session=requests.Session(), adapter=transport.get_adapter())
+        self.assertIsNot(client_session.get_adapter("https://adc.example/"), transport.adapter)
+        client_session.close()
+        self.assertIs(transport.adapter.poolmanager.connection_from_url("http://writer.example:8080/"), pool)
+        self.assertIn("writer.example:8080", transport.pool_stats())
+
+    def test_client_adapter_shares_stats(self):
+        transport = HttpTransport()
+        client_session = transport.mount(session=requests.Session(), adapter=transport.get_adapter())
+        with mock.patch.object(HTTPAdapter, "send", lambda adapter, request, *a, **kw: fake_response(request)):
+            client_session.get("https://adc.example/api")
+            transport.get_session().get("https://adc.example/api")
+        self.assertEqual(transport.pool_stats()["adc.example:443"]["requests"], 2)
+
+    def test_mount_client_keeps_max_retries(self):
+        transport = HttpTransport()
+        session = requests.Session()
+        session.mount("https://", HTTPAdapter(max_retries=Retry(total=3)))
+        self.assertTrue(transport.mount_client(session=session))
+        adapter = session.get_adapter("https://adc.example/")
+        self.assertIsInstance(adapter, PoolStatsAdapter)
+        self.assertIsNot(adapter, transport.adapter)
+        self.assertEqual(adapter.max_retries.total, 3)
+        self.assertIs(session.get_adapter("http://adc.example/"), adapter)
+
+    def test_mount_client_keeps_custom_adapter(self):
+        class TlsAdapter(HTTPAdapter):
+            pass
+
+        transport = HttpTransport()
+        session = requests.Session()
+        custom = TlsAdapter()
+        session.mount("https://", custom)
+        transport.mount_client(session=session)
+        self.assertIs(session.get_adapter("https://adc.example/"), custom)
+        self.assertIsInstance(session.get_adapter("http://adc.example/"), PoolStatsAdapter)
+
+    def test_close_closes_adapters(self):
+        transport = HttpTransport()
+        client_adapter = transport.get_adapter()
+        with mock.patch.object(PoolStatsAdapter, "close") as close:
+            transport.close()
+        self.assertEqual(close.call_count, 2)
+        self.assertFalse(hasattr(transport, "session"))
+        del client_adapter
+
+
+class TestHttpWriter(unittest.TestCase):
+
+    def test_concurrent_writes_through_shared_adapter(self):
+        transport = HttpTransport(pool_maxsize=4)
+        writer = HttpWriter(url="http://writer.example:8080/", method="POST", transport=transport)
+        lock = threading.Lock()
+        state = {"active": 0, "max_active": 0, "adapters": set(), "sessions": set()}
+
+        def send(adapter, request, *args, **kwargs):
+            with lock:
+                state["active"] += 1
+                state["max_active"] = max(state["max_active"], state["active"])
+                state["adapters"].add(adapter)
+            time.sleep(0.05)
+            with lock:
+                state["active"] -= 1
+            return fake_response(request=request)
+
+        def write():
+            metrics = [{"@timestamp": datetime.datetime.now(tz=datetime.timezone.utc), "value": 1}]
+            writer.write(data=metrics, measurement="test")
+            with lock:
+                state["sessions"].add(writer.session)
+
+        with mock.patch.object(HTTPAdapter, "send", send):
+            threads = [threading.Thread(target=write) for _ in range(4)]
+            [t.start() for t in threads]
+            [t.join() for t in threads]
+
+        self.assertGreater(state["max_active"], 1)
+        self.assertEqual(state["adapters"], {transport.adapter})
+        self.assertEqual(len(state["sessions"]), 4)
+        self.assertIsInstance(transport.adapter, PoolStatsAdapter)
+        self.assertEqual(transport.pool_stats()["writer.example:8080"]["requests"], 4)